@@ -1,34 +1,154 @@
 from fastapi import FastAPI, Query, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import iterate_in_threadpool
 from sse_starlette.sse import EventSourceResponse        
-import pandas as pd
 import sqlite3
 import os
 import io
+import csv
 from enum import Enum
 from typing import Optional
 import json
+import orjson
 import asyncio
+import anyio
+import threading
+import queue
+import hashlib
+import urllib.parse
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from cachetools import LRUCache
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 
+# ---------------------------------------------------------------------
+# Pooled SQLite connections
+# Both databases are read-only at runtime, so a small pool of long-lived
+# connections per file is opened once and handed out to requests instead of
+# paying the open/close + cold page cache cost each time. The pool size also
+# bounds how many queries run against a file at once. The one-off writes at
+# startup (indexes, ANALYZE) go through a separate write_connection().
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",     # 256 MiB page cache
+)
+# Memory-mapped I/O lets SQLite read pages straight out of the OS page cache
+# instead of copying them with read(2). The window covers at least 1 GiB and
+# grows to the file size so full-table reads (e.g. /psi_block) are mapped end
+# to end; SQLite clamps it to its compile-time maximum.
+SQLITE_MIN_MMAP_SIZE = 1024 ** 3
+POOL_SIZE = 8
+POOL_TIMEOUT = 30  # seconds to wait for a free connection
+
+_pools: dict[str, queue.Queue] = {}
+_pools_lock = threading.Lock()
+
+def open_connection(db_file: str, read_only: bool = True) -> sqlite3.Connection:
+    """
+    Open a connection to db_file with the performance pragmas applied.
+    Pooled request connections are read_only: opened with mode=ro, they never
+    take a write lock or enter the write path, and cannot modify the data.
+    """
+    if not os.path.exists(db_file):
+        raise FileNotFoundError(f"Database file {db_file} not found in container.")
+    # The endpoints share a handful of SQL shapes; a larger prepared-statement
+    # cache keeps all of them compiled across requests
+    uri = f"file:{urllib.parse.quote(db_file)}" + ("?mode=ro" if read_only else "")
+    conn = sqlite3.connect(
+        uri, uri=True, check_same_thread=False, isolation_level=None, cached_statements=256
+    )
+    mmap_size = max(SQLITE_MIN_MMAP_SIZE, os.path.getsize(db_file))
+    pragmas = SQLITE_PRAGMAS + (f"PRAGMA mmap_size={mmap_size}",)
+    if not read_only:
+        # The journal mode is stored in the file, so only the writer sets it
+        pragmas = ("PRAGMA journal_mode=WAL",) + pragmas
+    for pragma in pragmas:
+        try:
+            conn.execute(pragma)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not apply '{pragma}' to {db_file}: {e}")
+    return conn
+
+def get_pool(db_file: str) -> queue.Queue:
+    """Return the connection pool for db_file, filling it on first use."""
+    pool = _pools.get(db_file)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(db_file)
+        if pool is None:
+            pool = queue.Queue()
+            for _ in range(POOL_SIZE):
+                pool.put(open_connection(db_file))
+            _pools[db_file] = pool
+    return pool
+
+def acquire_connection(db_file: str) -> sqlite3.Connection:
+    try:
+        return get_pool(db_file).get(timeout=POOL_TIMEOUT)
+    except queue.Empty:
+        raise HTTPException(status_code=503, detail="Database busy, try again shortly.")
+
+def release_connection(db_file: str, conn: sqlite3.Connection):
+    get_pool(db_file).put(conn)
+
+@contextmanager
+def borrow_connection(db_file: str):
+    conn = acquire_connection(db_file)
+    try:
+        yield conn
+    finally:
+        release_connection(db_file, conn)
+
+@contextmanager
+def write_connection(db_file: str):
+    """
+    Short-lived connection for the startup migrations (index creation).
+    Kept out of the pools so request connections never hold a write
+    transaction.
+    """
+    conn = open_connection(db_file, read_only=False)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+# Caps on concurrent worker threads doing SQLite work, one per database,
+# created on first use inside the running event loop
+_db_limiters: dict[str, anyio.CapacityLimiter] = {}
+
+def db_limiter(db_file: str) -> anyio.CapacityLimiter:
+    limiter = _db_limiters.get(db_file)
+    if limiter is None:
+        limiter = _db_limiters[db_file] = anyio.CapacityLimiter(POOL_SIZE)
+    return limiter
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            while not pool.empty():
+                pool.get_nowait().close()
+        _pools.clear()
+    _db_limiters.clear()
+
 # ---------------------------------------------------------------------
 # Path to your SQLite database
 DB_FILE = "/data/8cube.db"
 
-# Helper function to establish connection
+# Helper function to borrow a pooled connection (use as a context manager)
 def get_db_connection():
-    if not os.path.exists(DB_FILE):
-        raise FileNotFoundError(f"Database file {DB_FILE} not found in container.")
-    return sqlite3.connect(DB_FILE)
+    return borrow_connection(DB_FILE)
 
 # ---------------------------------------------------------------------
 # Path to the mean/variance SQLite database
 GENE_EXPR_DB_FILE = "/data/mean_var_DB.db"
 
 def get_gene_expr_db_connection():
-    if not os.path.exists(GENE_EXPR_DB_FILE):
-        raise FileNotFoundError(f"Database file {GENE_EXPR_DB_FILE} not found in container.")
-    return sqlite3.connect(GENE_EXPR_DB_FILE)
+    return borrow_connection(GENE_EXPR_DB_FILE)
 
 # ---------------------------------------------------------------------
 # Helper: Normalize gene and Ensembl IDs
@@ -38,69 +158,565 @@ def normalize_gene_inputs(gene_list: list[str]) -> list[str]:
     - Ensembl IDs → uppercase
     - Gene names → Title Case (first letter capitalized)
     """
-    normalized = []
-    for g in gene_list:
-        if g.upper().startswith("ENS"):
-            normalized.append(g.upper())
-        else:
-            normalized.append(g.capitalize())
-    return normalized
+    # Only the 3-character prefix is case-folded to tell the two apart
+    return [g.upper() if g[:3].upper() == "ENS" else g.capitalize() for g in gene_list]
 
 # ---------------------------------------------------------------------
-# Helper: Get unique values from a column
-def get_unique_values(column_name: str):
-    """Get unique values from table_1 for the given column."""
+# Limits on gene_list query parameters
+MAX_GENE_LIST = 1000
+GENE_LIST_INLINE_MAX = 200
+
+# ---------------------------------------------------------------------
+# Helper: "?, ?, ..." placeholder list for binding an IN (...) clause
+def sql_placeholders(n: int) -> str:
+    return ", ".join("?" * n)
+
+# ---------------------------------------------------------------------
+# SQL used by the endpoints
+# Kept as module constants / builders so every request with the same shape
+# sends SQLite the identical statement text and hits its statement cache.
+# The builders are memoized on their (table, list length) shape, so repeated
+# shapes also reuse the same formatted string.
+# Default psi/zeta cutoffs of /highly_specific and /non_specific
+DEFAULT_CUTOFF = 0.5
+
+SQL_HIGHLY_SPECIFIC = """
+    SELECT *
+    FROM table_1
+    WHERE Analysis_level = ?
+      AND Analysis_type = ?
+      AND Psi_mean > ?
+      AND Zeta_mean > ?
+    ORDER BY Psi_mean DESC, Zeta_mean DESC
+"""
+
+SQL_NON_SPECIFIC = """
+    SELECT *
+    FROM table_1
+    WHERE Analysis_level = ?
+      AND Analysis_type = ?
+      AND Psi_mean > ?
+      AND Zeta_mean < ?
+    ORDER BY Psi_mean DESC, Zeta_mean ASC
+"""
+
+@lru_cache(maxsize=1024)
+def table_sql(table_name: str) -> str:
+    return f'SELECT * FROM "{table_name}"'
+
+@lru_cache(maxsize=1024)
+def gene_filter_sql(table_name: str, n_genes: int) -> str:
+    """Rows of table_name whose gene_name or ensembl_id matches one of n_genes bound values."""
+    placeholders = sql_placeholders(n_genes)
+    return f"""
+        SELECT *
+        FROM "{table_name}"
+        WHERE gene_name COLLATE NOCASE IN ({placeholders})
+           OR ensembl_id COLLATE NOCASE IN ({placeholders})
+    """
+
+@lru_cache(maxsize=1024)
+def gene_filter_json_sql(table_name: str) -> str:
+    """Like gene_filter_sql, but the genes are bound as one JSON array parameter."""
+    return f"""
+        SELECT *
+        FROM "{table_name}"
+        WHERE gene_name COLLATE NOCASE IN (SELECT value FROM json_each(?1))
+           OR ensembl_id COLLATE NOCASE IN (SELECT value FROM json_each(?1))
+    """
+
+def gene_filter_query(table_name: str, gene_list: list[str]) -> tuple[str, list]:
+    """
+    Query and parameters selecting the rows of table_name for gene_list.
+    Short lists are bound as an inline IN (...) list; longer ones as a single
+    JSON array, so SQLite builds one lookup table instead of parsing hundreds
+    of terms, and the statement text stays the same whatever the list length.
+    """
+    if len(gene_list) <= GENE_LIST_INLINE_MAX:
+        return gene_filter_sql(table_name, len(gene_list)), gene_list + gene_list
+    return gene_filter_json_sql(table_name), [json.dumps(gene_list)]
+
+@lru_cache(maxsize=1024)
+def marker_sql(psi_block_table: str, block_label: str) -> str:
+    # Identifiers must already be validated against analysis_config
+    return f"""
+        SELECT T1.*, T2."{block_label}"
+        FROM "table_1" AS T1
+        INNER JOIN "{psi_block_table}" AS T2
+            ON T1.gene_name = T2.gene_name
+        WHERE T1.Analysis_level = ?
+          AND T1.Analysis_type = ?
+          AND T1.Psi_mean > ?
+          AND T2."{block_label}" > ?
+        ORDER BY T1.Psi_mean DESC, T2."{block_label}" DESC
+    """
+
+@lru_cache(maxsize=1024)
+def limit_sql(query: str) -> str:
+    return query + "    LIMIT ?\n"
+
+@lru_cache(maxsize=1024)
+def count_sql(query: str) -> str:
+    return f"SELECT COUNT(*) AS count FROM ({query})"
+
+def shape_query(query: str, params: tuple, limit: Optional[int], count_only: bool) -> tuple[str, tuple]:
+    """
+    Apply the optional limit / count_only request params to a gene-list query,
+    so clients that only show the top rows and a total don't download every
+    matching gene. The queries are already ordered, so LIMIT keeps the best rows.
+    """
+    if count_only:
+        return count_sql(query), params
+    if limit is not None:
+        return limit_sql(query), params + (limit,)
+    return query, params
+
+# ---------------------------------------------------------------------
+# Helper: Get the analysis levels and types present in table_1
+def load_levels_and_types() -> tuple[list[str], list[str]]:
+    """Sorted unique Analysis_level and Analysis_type values, read in one query."""
     try:
-        conn = get_db_connection()
-        query = f"SELECT DISTINCT {column_name} FROM table_1 WHERE {column_name} IS NOT NULL;"
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return sorted(df[column_name].dropna().unique().tolist())
+        query = """
+            SELECT DISTINCT Analysis_level, Analysis_type
+            FROM table_1
+            WHERE Analysis_level IS NOT NULL AND Analysis_type IS NOT NULL
+        """
+        with get_db_connection() as conn:
+            pairs = conn.execute(query).fetchall()
+        return sorted({level for level, _ in pairs}), sorted({a_type for _, a_type in pairs})
     except Exception as e:
-        print(f"Warning: Could not load unique values for {column_name}: {e}")
-        return []
+        print(f"Warning: Could not load analysis levels and types: {e}")
+        return [], []
 
-# Helper: Get column names from a table
-def get_columns_from_table(table_name: str):
-    """Fetch column names from a given table in the DB."""
+# Helper: Read the column names of every table in the DB in one pass
+TABLE_COLUMNS_SQL = """
+    SELECT m.name, p.name
+    FROM sqlite_master AS m
+    JOIN pragma_table_info(m.name) AS p
+    WHERE m.type = 'table'
+    ORDER BY m.name, p.cid
+"""
+
+def read_table_columns(conn: sqlite3.Connection) -> dict[str, list[str]]:
+    """Map each table in conn's database to its column names, in one query."""
+    columns = {}
+    for table, column in conn.execute(TABLE_COLUMNS_SQL):
+        columns.setdefault(table, []).append(column)
+    return columns
+
+def load_table_columns() -> dict[str, list[str]]:
+    """Map each table in the DB to its column names."""
     try:
-        conn = get_db_connection()
-        cursor = conn.execute(f"PRAGMA table_info('{table_name}')")
-        columns = [row[1] for row in cursor.fetchall()]
-        conn.close()
-        # Exclude non-block columns
-        return [c for c in columns if c not in ("gene_name", "ensembl_id")]
+        with get_db_connection() as conn:
+            return read_table_columns(conn)
     except Exception as e:
-        print(f"Warning: Could not fetch columns for {table_name}: {e}")
-        return []
+        print(f"Warning: Could not load table columns: {e}")
+        return {}
+
+# Helper: Get column names from a table
+def get_columns_from_table(table_name: str):
+    """Look up column names for a given table from the startup schema scan."""
+    columns = table_columns.get(table_name, [])
+    # Exclude non-block columns
+    return [c for c in columns if c not in ("gene_name", "ensembl_id")]
+
+# Helper: Nested {level: {type: [block labels]}} config for the given levels/types
+def build_analysis_config(levels: list[str], types: list[str]):
+    excluded_cols = {"gene_name", "ensembl_id", "Analysis_level", "Analysis_type"}
+
+    config = {}
+    for level in levels:
+        config[level] = {}
+        for a_type in types:
+            table_name = f"{level}_{a_type}"
+            block_labels = get_columns_from_table(table_name)
+            filtered_labels = [c for c in block_labels if c not in excluded_cols]
+            if filtered_labels:
+                config[level][a_type] = filtered_labels
+    return config
 
 # ---------------------------------------------------------------------
 # Dynamically build Enums for dropdowns
-analysis_levels = get_unique_values("Analysis_level")
-analysis_types = get_unique_values("Analysis_type")
+# The schema is static, so levels, types and the full /config payload are
+# computed once here and served from memory afterwards.
+table_columns = load_table_columns()
+analysis_levels, analysis_types = load_levels_and_types()
+analysis_config = build_analysis_config(analysis_levels, analysis_types)
+
+# Full /config response, serialized once (orjson: compact UTF-8 bytes)
+analysis_config_json = orjson.dumps(
+    {
+        "description": "Dictionary of all available analysis levels, types, and block labels.",
+        "analysis_config": analysis_config
+    }
+)
 
 AnalysisLevel = Enum("AnalysisLevel", {v: v for v in analysis_levels})
 AnalysisType = Enum("AnalysisType", {v: v for v in analysis_types})
 
+# ---------------------------------------------------------------------
+# Startup migration: indexes for the hot WHERE / ORDER BY / JOIN columns
+TABLE_1_INDEXES = {
+    # /highly_specific: filter by level/type, ORDER BY Psi_mean DESC, Zeta_mean DESC
+    "idx_t1_lvl_type_psi_zeta": "table_1(Analysis_level, Analysis_type, Psi_mean DESC, Zeta_mean DESC)",
+    # /non_specific: filter by level/type, ORDER BY Psi_mean DESC, Zeta_mean ASC
+    "idx_t1_lvl_type_psi_zeta_asc": "table_1(Analysis_level, Analysis_type, Psi_mean DESC, Zeta_mean ASC)",
+    # /specificity: case-insensitive gene_name / ensembl_id lookups
+    "idx_t1_gene": "table_1(gene_name COLLATE NOCASE)",
+    "idx_t1_ensembl": "table_1(ensembl_id COLLATE NOCASE)",
+}
+
+def gene_lookup_indexes(table_name: str, columns) -> dict[str, str]:
+    """NOCASE indexes for the gene_name / ensembl_id filters on table_name."""
+    indexes = {}
+    if "gene_name" in columns:
+        indexes[f"idx_{table_name}_gene_nocase"] = f'"{table_name}"(gene_name COLLATE NOCASE)'
+    if "ensembl_id" in columns:
+        indexes[f"idx_{table_name}_ensembl_nocase"] = f'"{table_name}"(ensembl_id COLLATE NOCASE)'
+    return indexes
+
+def create_missing_indexes(conn: sqlite3.Connection, indexes: dict[str, str]):
+    """Create the indexes not yet in the database and refresh planner statistics."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    created = False
+    for name, target in indexes.items():
+        if name in existing:
+            continue
+        try:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON {target}')
+            created = True
+        except sqlite3.Error as e:
+            print(f"Warning: Could not create index {name}: {e}")
+
+    if created:
+        conn.execute("ANALYZE")
+
+def ensure_indexes():
+    """Create any missing indexes on both databases."""
+    indexes = dict(TABLE_1_INDEXES)
+    for level, types in analysis_config.items():
+        for a_type in types:
+            table_name = f"{level}_{a_type}"
+            # /marker joins table_1 to the psi_block table on gene_name
+            indexes[f"idx_{table_name}_gene"] = f'"{table_name}"(gene_name)'
+            # /psi_block?gene_list=...
+            indexes.update(gene_lookup_indexes(table_name, table_columns.get(table_name, [])))
+    with write_connection(DB_FILE) as conn:
+        create_missing_indexes(conn, indexes)
+
+    # /gene_expression?gene_list=... on every table of the mean/variance DB
+    with write_connection(GENE_EXPR_DB_FILE) as conn:
+        indexes = {}
+        for table_name, columns in read_table_columns(conn).items():
+            if not table_name.startswith("sqlite_"):
+                indexes.update(gene_lookup_indexes(table_name, columns))
+        create_missing_indexes(conn, indexes)
+
+# ---------------------------------------------------------------------
+# Debug aid: report endpoint queries that fall back to a full table scan or
+# to sorting their results at request time
+# The level/type/Psi/Zeta indexes already return these rows in ORDER BY order
+SORTED_ENDPOINTS = ("/highly_specific", "/non_specific")
+
+def check_query_plans():
+    """Run EXPLAIN QUERY PLAN on each table_1 endpoint query and warn on SCANs and sorts."""
+    level, types = next(((l, t) for l, t in analysis_config.items() if t), (None, None))
+    if level is None:
+        return
+    a_type, block_labels = next(iter(types.items()))
+
+    plans = {
+        "/specificity": (gene_filter_sql("table_1", 1), ("Gene", "Gene")),
+        "/highly_specific": (SQL_HIGHLY_SPECIFIC, (level, a_type, 0.5, 0.5)),
+        "/non_specific": (SQL_NON_SPECIFIC, (level, a_type, 0.5, 0.5)),
+        "/marker": (marker_sql(f"{level}_{a_type}", block_labels[0]), (level, a_type, 0.5, 0.5)),
+    }
+    with get_db_connection() as conn:
+        # EXPLAIN doesn't check the schema cookie; a real read reloads the
+        # schema so indexes created by another connection are visible
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        for endpoint, (query, params) in plans.items():
+            for row in conn.execute("EXPLAIN QUERY PLAN " + query, params):
+                detail = row[-1]
+                if detail.startswith("SCAN"):
+                    print(f"Warning: {endpoint} query plan uses a full scan: {detail}")
+                elif endpoint in SORTED_ENDPOINTS and detail.startswith("USE TEMP B-TREE"):
+                    print(f"Warning: {endpoint} query plan sorts at request time: {detail}")
+
+# ---------------------------------------------------------------------
+# App lifespan: fill the connection pools on startup, close them on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for db_file in (DB_FILE, GENE_EXPR_DB_FILE):
+        try:
+            get_pool(db_file)
+        except Exception as e:
+            print(f"Warning: Could not open {db_file}: {e}")
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"Warning: Could not create indexes: {e}")
+    try:
+        warm_result_cache()
+    except Exception as e:
+        print(f"Warning: Could not precompute default results: {e}")
+    if os.environ.get("DEBUG_PLAN"):
+        try:
+            check_query_plans()
+        except Exception as e:
+            print(f"Warning: Could not check query plans: {e}")
+    yield
+    close_pools()
+    await close_mcp_client()
+
 # ---------------------------------------------------------------------
 # Initialize FastAPI app
 app = FastAPI(
     title="8cubeDB API",
     description="API for querying gene specificity from the Rebboah et al. (2025) 8cube founder dataset.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Compress responses for clients that accept gzip. CSV output (repeated level/
+# type strings, float text) shrinks roughly 10x; level 1 keeps most of that
+# ratio at a fraction of the CPU. Streamed CSV is compressed chunk by chunk as
+# it is produced. SSE streams (/mcp/sse) must stay uncompressed, or the client
+# never sees the buffered events; the middleware skips text/event-stream only
+# from Starlette 0.46 on, hence the starlette pin in requirements.txt.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
+# ---------------------------------------------------------------------
+# Helper: Serialize cursor rows straight to CSV, one chunk of rows at a time
+# Each fetchmany batch is turned into an Arrow table and written by Arrow's C++
+# CSV writer. Values are left unquoted like csv.writer output; a batch Arrow
+# refuses to write that way (a value containing a comma or quote, or a column
+# with mixed types) is written with csv.writer instead.
+CSV_WRITE_OPTIONS = pacsv.WriteOptions(include_header=False, quoting_style="none")
+
+def rows_to_table(names: list[str], rows: list[tuple], schema: Optional[pa.Schema] = None) -> pa.Table:
+    """
+    Arrow table from a list of row tuples, with column types inferred or taken
+    from schema (raises ArrowException on mixed-type or non-conforming columns).
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    if schema is None:
+        return pa.Table.from_arrays([pa.array(col) for col in columns], names=names)
+    return pa.Table.from_arrays(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+    )
+
+def csv_chunks(cursor: sqlite3.Cursor, chunk_rows: int = 10_000):
+    names = [d[0] for d in cursor.description]
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(names)
+    yield text.getvalue().encode("utf-8")
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        sink = io.BytesIO()
+        try:
+            pacsv.write_csv(rows_to_table(names, rows), sink, CSV_WRITE_OPTIONS)
+            yield sink.getvalue()
+        except pa.ArrowException:
+            text.seek(0)
+            text.truncate()
+            writer.writerows(rows)
+            yield text.getvalue().encode("utf-8")
+
 # ---------------------------------------------------------------------
-# Helper to stream CSV from DataFrame
-def df_to_csv_stream(df: pd.DataFrame, filename: str = "data.csv"):
-    buffer = io.StringIO()
-    df.to_csv(buffer, index=False)
-    buffer.seek(0)
-    return StreamingResponse(
-        buffer,
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+# Result cache for the read-only endpoints
+# Identical queries are answered from the already-serialized result without
+# touching SQLite. Keys include the DB file's mtime, so entries stay valid for
+# as long as the file is unchanged and a replaced DB is never served stale.
+# Results larger than _MAX_CACHED_CSV_BYTES (e.g. full psi_block dumps) are
+# streamed but not kept. The cache is bounded by the total size of the stored
+# bodies (warm-up entries included), not by entry count, so its memory use
+# stays fixed however many distinct cutoffs are requested.
+_RESULT_CACHE_BYTES = 256 * 1024 * 1024
+_RESULT_CACHE = LRUCache(maxsize=_RESULT_CACHE_BYTES, getsizeof=len)
+_RESULT_CACHE_LOCK = threading.Lock()
+_MAX_CACHED_CSV_BYTES = 8 * 1024 * 1024
+
+# Media type for the Arrow IPC streaming format (see query_csv_response)
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+# Cached under an Arrow key whose result can't be sent as Arrow (never a
+# valid IPC stream, and it costs the byte-bounded cache next to nothing)
+_NO_ARROW = b"no-arrow"
+
+def result_cache_key(db_file: str, query: str, params, as_arrow: bool = False) -> bytes:
+    mtime_ns = os.stat(db_file).st_mtime_ns
+    return hashlib.blake2b(
+        repr((db_file, mtime_ns, query, tuple(params), as_arrow)).encode(), digest_size=16
+    ).digest()
+
+def _stream_and_cache(key: bytes, chunks, on_close):
+    parts = []
+    size = 0
+    try:
+        for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size <= _MAX_CACHED_CSV_BYTES:
+                    parts.append(chunk)
+                else:
+                    parts = None
+            yield chunk
+    finally:
+        on_close()
+    if parts is not None:
+        with _RESULT_CACHE_LOCK:
+            _RESULT_CACHE[key] = b"".join(parts)
+
+def query_arrow_bytes(db_file: str, query: str, params, key: bytes, chunk_rows: int = 10_000) -> Optional[bytes]:
+    """
+    Execute query and return the result as an Arrow IPC stream, written one
+    fetchmany batch at a time. Returns None when the result can't be sent that
+    way: a column mixes types (the first batch fixes the schema), or the stream
+    grows past _MAX_CACHED_CSV_BYTES (e.g. full psi_block dumps). Callers then
+    stream the CSV instead.
+    """
+    sink = pa.BufferOutputStream()
+    encoded = True
+    with borrow_connection(db_file) as conn:
+        cursor = conn.execute(query, params)
+        try:
+            names = [d[0] for d in cursor.description]
+            rows = cursor.fetchmany(chunk_rows)
+            table = rows_to_table(names, rows)
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                while rows:
+                    writer.write_table(table)
+                    if sink.tell() > _MAX_CACHED_CSV_BYTES:
+                        encoded = False
+                        break
+                    rows = cursor.fetchmany(chunk_rows)
+                    if rows:
+                        table = rows_to_table(names, rows, table.schema)
+        except pa.ArrowException:
+            encoded = False
+        finally:
+            cursor.close()
+    if not encoded:
+        # Remember it, so later requests for this key go straight to the CSV
+        # instead of re-running the query as Arrow first
+        with _RESULT_CACHE_LOCK:
+            _RESULT_CACHE[key] = _NO_ARROW
+        return None
+    data = sink.getvalue().to_pybytes()
+    if len(data) <= _MAX_CACHED_CSV_BYTES:
+        with _RESULT_CACHE_LOCK:
+            _RESULT_CACHE[key] = data
+    return data
+
+def open_csv_stream(db_file: str, query: str, params, key: bytes):
+    """
+    Execute query on a pooled connection and return (header chunk, generator
+    of the remaining CSV chunks). The connection stays checked out until the
+    generator finishes or is closed; callers that may stop early must close() it.
+    """
+    # Executing here (not inside the generator) surfaces SQL errors to the caller.
+    conn = acquire_connection(db_file)
+    try:
+        cursor = conn.execute(query, params)
+    except Exception:
+        release_connection(db_file, conn)
+        raise
+    chunks = _stream_and_cache(key, csv_chunks(cursor), lambda: release_connection(db_file, conn))
+    # Pull the header chunk now, so the generator has started and close()
+    # runs its finally block (which returns the connection)
+    header = next(chunks)
+    return header, chunks
+
+async def csv_response_body(header: bytes, chunks):
+    """
+    Response body for an open_csv_stream result. Starlette never closes a sync
+    body iterator, so this async wrapper does: when the download finishes, fails
+    or is cancelled by a client disconnect, the generator is closed and its
+    connection goes back to the pool right away instead of whenever the
+    garbage collector gets to it.
+    """
+    try:
+        yield header
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+    finally:
+        chunks.close()
+
+def _etag(key: bytes) -> str:
+    return '"' + key.hex() + '"'
+
+def _cache_headers(key: bytes) -> dict:
+    return {"ETag": _etag(key), "Cache-Control": "public, max-age=60", "Vary": "Accept"}
+
+async def query_csv_response(request: Request, db_file: str, query: str, params=(), filename: str = "data.csv"):
+    """
+    Run query against db_file and return the result as a CSV download, cached
+    by (query, params). Clients sending Accept: application/vnd.apache.arrow.stream
+    get the same rows as an Arrow IPC stream instead, which they can load
+    without parsing text; results that don't fit Arrow are still sent as CSV.
+    """
+    as_arrow = ARROW_STREAM_TYPE in request.headers.get("accept", "")
+    key = result_cache_key(db_file, query, params, as_arrow)
+
+    # The same query against the same DB file always returns the same bytes,
+    # so clients revalidating with If-None-Match get a bodyless 304
+    if_none_match = {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}
+    if _etag(key) in if_none_match:
+        return Response(status_code=304, headers=_cache_headers(key))
+
+    with _RESULT_CACHE_LOCK:
+        data = _RESULT_CACHE.get(key)
+
+    # Blocking SQLite work runs in a worker thread, at most POOL_SIZE at a time
+    # per database; requests waiting for a connection queue on the event loop
+    # instead of each tying up a thread
+    if data is None and as_arrow:
+        data = await anyio.to_thread.run_sync(
+            query_arrow_bytes, db_file, query, params, key, limiter=db_limiter(db_file)
+        )
+    if as_arrow and (data is None or data == _NO_ARROW):
+        # Not representable as Arrow (mixed-type column or too large):
+        # answer with the CSV, which the clients also accept
+        as_arrow = False
+        key = result_cache_key(db_file, query, params)
+        if _etag(key) in if_none_match:
+            return Response(status_code=304, headers=_cache_headers(key))
+        with _RESULT_CACHE_LOCK:
+            data = _RESULT_CACHE.get(key)
+
+    if as_arrow:
+        media_type = ARROW_STREAM_TYPE
+        filename = filename.removesuffix(".csv") + ".arrow"
+    else:
+        media_type = "text/csv"
+    headers = {"Content-Disposition": f"attachment; filename={filename}", **_cache_headers(key)}
+    if data is not None:
+        return Response(data, media_type=media_type, headers=headers)
+    header, chunks = await anyio.to_thread.run_sync(
+        open_csv_stream, db_file, query, params, key, limiter=db_limiter(db_file)
     )
+    return StreamingResponse(csv_response_body(header, chunks), media_type=media_type, headers=headers)
+
+def warm_result_cache():
+    """
+    Precompute /highly_specific and /non_specific at the default cutoffs for
+    every level/type, in both formats, so the common requests never hit SQLite.
+    """
+    for level in analysis_levels:
+        for a_type in analysis_types:
+            params = (level, a_type, DEFAULT_CUTOFF, DEFAULT_CUTOFF)
+            for query in (SQL_HIGHLY_SPECIFIC, SQL_NON_SPECIFIC):
+                try:
+                    query_arrow_bytes(DB_FILE, query, params, result_cache_key(DB_FILE, query, params, True))
+                    _, chunks = open_csv_stream(DB_FILE, query, params, result_cache_key(DB_FILE, query, params))
+                    for _ in chunks:
+                        pass
+                except Exception as e:
+                    print(f"Warning: could not warm cache for {level}/{a_type}: {e}")
 
 # ---------------------------------------------------------------------
 @app.get("/config")
@@ -112,12 +728,9 @@ def get_analysis_config(
     Returns block label options for a given analysis_level and analysis_type,
     or the full nested configuration if no parameters are provided.
     """
-    excluded_cols = {"gene_name", "ensembl_id", "Analysis_level", "Analysis_type"}
-
     if analysis_level and analysis_type:
         table_name = f"{analysis_level.value}_{analysis_type.value}"
-        block_labels = get_columns_from_table(table_name)
-        filtered_labels = [c for c in block_labels if c not in excluded_cols]
+        filtered_labels = analysis_config.get(analysis_level.value, {}).get(analysis_type.value, [])
 
         if not filtered_labels:
             raise HTTPException(
@@ -125,50 +738,31 @@ def get_analysis_config(
                 detail=f"No valid block labels found for {table_name}"
             )
 
-        return {
-            "analysis_level": analysis_level.value,
-            "analysis_type": analysis_type.value,
-            "block_labels": filtered_labels
-        }
+        return Response(
+            orjson.dumps({
+                "analysis_level": analysis_level.value,
+                "analysis_type": analysis_type.value,
+                "block_labels": filtered_labels
+            }),
+            media_type="application/json"
+        )
 
-    config = {}
-    for level in analysis_levels:
-        config[level] = {}
-        for a_type in analysis_types:
-            table_name = f"{level}_{a_type}"
-            block_labels = get_columns_from_table(table_name)
-            filtered_labels = [c for c in block_labels if c not in excluded_cols]
-            if filtered_labels:
-                config[level][a_type] = filtered_labels
-
-    if not config:
+    if not analysis_config:
         raise HTTPException(status_code=404, detail="No valid analysis configuration found in database.")
 
-    return {
-        "description": "Dictionary of all available analysis levels, types, and block labels.",
-        "analysis_config": config
-    }
+    return Response(analysis_config_json, media_type="application/json")
 
 # ---------------------------------------------------------------------
 # Endpoint 1: Specificity
 @app.get("/specificity")
-def extract_all_specificity_per_gene(
-    gene_list: list[str] = Query(..., description="List of gene names or Ensembl IDs")
+async def extract_all_specificity_per_gene(
+    request: Request,
+    gene_list: list[str] = Query(..., max_length=MAX_GENE_LIST, description="List of gene names or Ensembl IDs")
 ):
     """Extract rows where 'gene_name' OR 'ensembl_id' is in gene_list."""
-    conn = get_db_connection()
-
     # Normalize input and build query (case-insensitive)
     gene_list = normalize_gene_inputs(gene_list)
-    gene_str = ', '.join(f"'{g}'" for g in gene_list)
-    query = f"""
-        SELECT *
-        FROM table_1
-        WHERE gene_name COLLATE NOCASE IN ({gene_str})
-           OR ensembl_id COLLATE NOCASE IN ({gene_str})
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    query, params = gene_filter_query("table_1", gene_list)
 
     if len(gene_list) <= 3:
         safe_names = [g.replace(" ", "_") for g in gene_list]
@@ -176,34 +770,29 @@ def extract_all_specificity_per_gene(
     else:
         filename = f"{len(gene_list)}_specificity.csv"
 
-    return df_to_csv_stream(df, filename)
+    return await query_csv_response(request, DB_FILE, query, params, filename)
 
 # ---------------------------------------------------------------------
 # Endpoint 2: psi_block
 @app.get("/psi_block")
-def extract_psi_block(
+async def extract_psi_block(
+    request: Request,
     analysis_level: AnalysisLevel,
     analysis_type: AnalysisType,
-    gene_list: Optional[list[str]] = Query(None, description="List of gene names or Ensembl IDs to filter (optional)")
+    gene_list: Optional[list[str]] = Query(None, max_length=MAX_GENE_LIST, description="List of gene names or Ensembl IDs to filter (optional)")
 ):
     """Reads a psi_block table from the DB based on analysis type and level."""
-    conn = get_db_connection()
     table_name = f"{analysis_level.value}_{analysis_type.value}"
-    base_query = f"SELECT * FROM '{table_name}'"
+    if analysis_type.value not in analysis_config.get(analysis_level.value, {}):
+        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
+
+    params = []
 
     if gene_list:
         gene_list = normalize_gene_inputs(gene_list)
-        gene_str = ', '.join(f"'{g}'" for g in gene_list)
-        query = f"{base_query} WHERE gene_name COLLATE NOCASE IN ({gene_str}) OR ensembl_id COLLATE NOCASE IN ({gene_str})"
+        query, params = gene_filter_query(table_name, gene_list)
     else:
-        query = base_query
-
-    try:
-        df = pd.read_sql_query(query, conn)
-    except pd.io.sql.DatabaseError as e:
-        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found. {e}")
-    finally:
-        conn.close()
+        query = table_sql(table_name)
 
     if gene_list:
         if len(gene_list) <= 3:
@@ -214,126 +803,95 @@ def extract_psi_block(
     else:
         filename = f"all_{table_name}_psi_block.csv"
 
-    return df_to_csv_stream(df, filename)
+    try:
+        return await query_csv_response(request, DB_FILE, query, params, filename)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found. {e}")
 
 # ---------------------------------------------------------------------
 # Endpoint 3: Highly specific genes
 @app.get("/highly_specific")
-def extract_highly_specific(
+async def extract_highly_specific(
+    request: Request,
     analysis_level: AnalysisLevel,
     analysis_type: AnalysisType,
-    psi_cutoff: float = 0.5,
-    zeta_cutoff: float = 0.5
+    psi_cutoff: float = DEFAULT_CUTOFF,
+    zeta_cutoff: float = DEFAULT_CUTOFF,
+    limit: Optional[int] = Query(None, ge=1, description="Return only the first N rows"),
+    count_only: bool = Query(False, description="Return only the number of matching rows")
 ):
     """Extracts genes highly specific to the given analysis level/type."""
-    conn = get_db_connection()
-    query = f"""
-        SELECT *
-        FROM table_1
-        WHERE Analysis_level = '{analysis_level.value}'
-          AND Analysis_type = '{analysis_type.value}'
-          AND Psi_mean > {psi_cutoff}
-          AND Zeta_mean > {zeta_cutoff}
-        ORDER BY Psi_mean DESC, Zeta_mean DESC
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df_to_csv_stream(df, "highly_specific.csv")
+    params = (analysis_level.value, analysis_type.value, psi_cutoff, zeta_cutoff)
+    query, params = shape_query(SQL_HIGHLY_SPECIFIC, params, limit, count_only)
+    return await query_csv_response(request, DB_FILE, query, params, "highly_specific.csv")
 
 # ---------------------------------------------------------------------
 # Endpoint 4: Non-specific housekeeping genes
 @app.get("/non_specific")
-def extract_non_specific(
+async def extract_non_specific(
+    request: Request,
     analysis_level: AnalysisLevel,
     analysis_type: AnalysisType,
-    psi_cutoff: float = 0.5,
-    zeta_cutoff: float = 0.5
+    psi_cutoff: float = DEFAULT_CUTOFF,
+    zeta_cutoff: float = DEFAULT_CUTOFF,
+    limit: Optional[int] = Query(None, ge=1, description="Return only the first N rows"),
+    count_only: bool = Query(False, description="Return only the number of matching rows")
 ):
     """Extracts non-specific (housekeeping) genes."""
-    conn = get_db_connection()
-    query = f"""
-        SELECT *
-        FROM table_1
-        WHERE Analysis_level = '{analysis_level.value}'
-          AND Analysis_type = '{analysis_type.value}'
-          AND Psi_mean > {psi_cutoff}
-          AND Zeta_mean < {zeta_cutoff}
-        ORDER BY Psi_mean DESC, Zeta_mean ASC
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df_to_csv_stream(df, "non_specific.csv")
+    params = (analysis_level.value, analysis_type.value, psi_cutoff, zeta_cutoff)
+    query, params = shape_query(SQL_NON_SPECIFIC, params, limit, count_only)
+    return await query_csv_response(request, DB_FILE, query, params, "non_specific.csv")
 
 # ---------------------------------------------------------------------
 # Endpoint 5: Marker genes
 @app.get("/marker")
-def extract_marker(
+async def extract_marker(
+    request: Request,
     analysis_level: AnalysisLevel,
     analysis_type: AnalysisType,
     block_label: str,
     psi_cutoff: float = 0.5,
-    psi_block_cutoff: float = 0.5
+    psi_block_cutoff: float = 0.5,
+    limit: Optional[int] = Query(None, ge=1, description="Return only the first N rows"),
+    count_only: bool = Query(False, description="Return only the number of matching rows")
 ):
-    conn = get_db_connection()
-    main_table_name = '"table_1"' 
     psi_block_table = f'{analysis_level.value}_{analysis_type.value}'
-    psi_block_table_quoted = f'"{psi_block_table}"' 
 
-    query = f"""
-        SELECT T1.*, T2."{block_label}"
-        FROM {main_table_name} AS T1
-        INNER JOIN {psi_block_table_quoted} AS T2
-            ON T1.gene_name = T2.gene_name
-        WHERE T1.Analysis_level = '{analysis_level.value}'
-          AND T1.Analysis_type = '{analysis_type.value}'
-          AND T1.Psi_mean > {psi_cutoff}
-          AND T2."{block_label}" > {psi_block_cutoff}
-        ORDER BY T1.Psi_mean DESC, T2."{block_label}" DESC
-    """
+    # Column names can't be bound as parameters, so only block labels from the
+    # precomputed config are allowed into the query text (checked in memory)
+    if block_label not in analysis_config.get(analysis_level.value, {}).get(analysis_type.value, ()):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid block_label '{block_label}' for {psi_block_table}"
+        )
+
+    params = (analysis_level.value, analysis_type.value, psi_cutoff, psi_block_cutoff)
+    query, params = shape_query(marker_sql(psi_block_table, block_label), params, limit, count_only)
     try:
-        df = pd.read_sql_query(query, conn)
-    except pd.io.sql.DatabaseError as e:
+        return await query_csv_response(request, DB_FILE, query, params, "marker_genes.csv")
+    except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Error executing JOIN query: {e}")
-    finally:
-        conn.close()
-
-    return df_to_csv_stream(df, "marker_genes.csv")
 
 
 # ---------------------------------------------------------------------
 @app.get("/gene_expression")
-def extract_gene_expression(
+async def extract_gene_expression(
+    request: Request,
     analysis_level: AnalysisLevel,
     analysis_type: AnalysisType,
     gene_list: Optional[list[str]] = Query(
-        None, description="List of gene names or Ensembl IDs"
+        None, max_length=MAX_GENE_LIST, description="List of gene names or Ensembl IDs"
     ),
 ):
     """Extracts gene expression mean and variance values."""
-    conn = get_gene_expr_db_connection()
     table_name = f"{analysis_level.value}_{analysis_type.value}"
-    base_query = f'SELECT * FROM "{table_name}"'
+    params = []
 
     if gene_list:
         gene_list = normalize_gene_inputs(gene_list)
-        gene_str = ", ".join(f"'{g}'" for g in gene_list)
-
-        query = f"""
-            {base_query}
-            WHERE gene_name COLLATE NOCASE IN ({gene_str})
-               OR ensembl_id COLLATE NOCASE IN ({gene_str})
-        """
+        query, params = gene_filter_query(table_name, gene_list)
     else:
-        query = base_query
-
-    try:
-        df = pd.read_sql_query(query, conn)
-    except pd.io.sql.DatabaseError as e:
-        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found. {e}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading '{table_name}': {e}")
-    finally:
-        conn.close()
+        query = table_sql(table_name)
 
     if gene_list:
         if len(gene_list) <= 3:
@@ -344,31 +902,42 @@ def extract_gene_expression(
     else:
         filename = f"all_{table_name}_gene_expr.csv"
 
-    return df_to_csv_stream(df, filename)
+    try:
+        return await query_csv_response(request, GENE_EXPR_DB_FILE, query, params, filename)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found. {e}")
+    except HTTPException:
+        # e.g. the pool's 503 "Database busy"; pass it through unchanged
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading '{table_name}': {e}")
 
 
 # ---------------------------------------------------------------------
 # Root endpoint
+# The payload is static, so it is serialized once at import
+home_json = orjson.dumps({
+    "message": "Welcome to the 8cubeDB API!",
+    "note": "All endpoints stream CSV downloads.",
+    "analysis_levels": analysis_levels,
+    "analysis_types": analysis_types,
+    "endpoints": {
+        "/config": "View all analysis levels, types, and available block labels as json",
+        "/specificity": "Download gene specificity for a list of genes as CSV",
+        "/psi_block": "Download psi block table as CSV",
+        "/highly_specific": "Download highly specific genes as CSV",
+        "/non_specific": "Download housekeeping genes as CSV",
+        "/marker": "Download marker genes as CSV",
+        "/gene_expression": "Download gene expression mean and variance as CSV",
+        "/mcp/sse": "MCP Server-Sent Events endpoint",
+        "/mcp/messages": "MCP messages endpoint",
+        "/mcp/health": "MCP health check"
+    }
+})
+
 @app.get("/")
 def home():
-    return {
-        "message": "Welcome to the 8cubeDB API!",
-        "note": "All endpoints stream CSV downloads.",
-        "analysis_levels": analysis_levels,
-        "analysis_types": analysis_types,
-        "endpoints": {
-            "/config": "View all analysis levels, types, and available block labels as json",
-            "/specificity": "Download gene specificity for a list of genes as CSV",
-            "/psi_block": "Download psi block table as CSV",
-            "/highly_specific": "Download highly specific genes as CSV",
-            "/non_specific": "Download housekeeping genes as CSV",
-            "/marker": "Download marker genes as CSV",
-            "/gene_expression": "Download gene expression mean and variance as CSV",
-            "/mcp/sse": "MCP Server-Sent Events endpoint",
-            "/mcp/messages": "MCP messages endpoint",
-            "/mcp/health": "MCP health check"
-        }
-    }
+    return Response(home_json, media_type="application/json")
 
 # ============================================================================
 # MCP SERVER INTEGRATION - MANUAL IMPLEMENTATION
@@ -376,6 +945,12 @@ def home():
 
 # Import the MCP server 
 from mcp_server import server as mcp_server
+from mcp_server import list_tools, call_tool
+from mcp_server import close_client as close_mcp_client
+
+# Resolve the tool handlers once at import rather than on every message
+mcp_list_tools = getattr(mcp_server, "_list_tools_handler", list_tools)
+mcp_call_tool = getattr(mcp_server, "_call_tool_handler", call_tool)
 
 @app.get("/mcp/sse")
 async def mcp_sse_endpoint(request: Request):
@@ -443,14 +1018,7 @@ async def mcp_messages_endpoint(request: Request):
     # Handle tools/list
     if method == "tools/list":
         try:
-            # The server has a _list_tools_handler attribute that's the decorated function
-            # We need to call it directly (it's async)
-            if hasattr(mcp_server, '_list_tools_handler'):
-                tools_list = await mcp_server._list_tools_handler()
-            else:
-                # Fallback: manually import the list_tools function from mcp_server module
-                from mcp_server import list_tools
-                tools_list = await list_tools()
+            tools_list = await mcp_list_tools()
             
             return {
                 "jsonrpc": "2.0",
@@ -495,12 +1063,7 @@ async def mcp_messages_endpoint(request: Request):
                 }
             
             # Call the tool handler
-            if hasattr(mcp_server, '_call_tool_handler'):
-                result = await mcp_server._call_tool_handler(tool_name, arguments)
-            else:
-                # Fallback: manually import the call_tool function
-                from mcp_server import call_tool
-                result = await call_tool(tool_name, arguments)
+            result = await mcp_call_tool(tool_name, arguments)
             
             # Convert TextContent to response format
             content_list = []
@@ -555,15 +1118,17 @@ async def mcp_messages_endpoint(request: Request):
     }
 
 
+mcp_health_json = orjson.dumps({
+    "status": "ok",
+    "server": "8cubeDB-Explorer",
+    "version": "1.0.0",
+    "endpoints": {
+        "sse": "/mcp/sse",
+        "messages": "/mcp/messages"
+    }
+})
+
 @app.get("/mcp/health")
 async def mcp_health():
     """Health check for MCP server"""
-    return {
-        "status": "ok",
-        "server": "8cubeDB-Explorer",
-        "version": "1.0.0",
-        "endpoints": {
-            "sse": "/mcp/sse",
-            "messages": "/mcp/messages"
-        }
-    }
\ No newline at end of file
+    return Response(mcp_health_json, media_type="application/json")
\ No newline at end of file
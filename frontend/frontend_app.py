@@ -1,10 +1,14 @@
 import streamlit as st
 import requests
 import pandas as pd
+import pyarrow as pa
 import plotly.graph_objects as go
 import math
 import base64
 import os
+import io
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 
 
@@ -12,6 +16,67 @@ API_URL = "https://eightcubedb.onrender.com"
 
 st.set_page_config(page_title="8cubeDB Dashboard", layout="wide")
 
+# --- HTTP sessions shared by the whole app: requests reuse their keep-alive
+# connections to the API instead of opening a new TLS connection each.
+# requests.Session isn't thread-safe, so each call borrows a session that no
+# other thread (browser session or Tab 1 worker) is using at the same time ---
+@st.cache_resource
+def get_session_pool():
+    return queue.Queue()
+
+def api_get(path, **kwargs):
+    pool = get_session_pool()
+    try:
+        session = pool.get_nowait()
+    except queue.Empty:
+        session = requests.Session()
+    try:
+        return session.get(f"{API_URL}/{path}", **kwargs)
+    finally:
+        pool.put(session)
+
+# --- Cached /config (the analysis configuration is static, and Streamlit
+# reruns this script on every widget interaction) ---
+@st.cache_data(ttl=3600)
+def fetch_config():
+    res = api_get("config", timeout=10)
+    res.raise_for_status()
+    return res.json().get("analysis_config", {})
+
+# --- Data endpoints: ask for Arrow IPC (no CSV parsing), fall back to CSV ---
+ARROW_HEADERS = {"Accept": "application/vnd.apache.arrow.stream"}
+
+def response_to_df(res):
+    if res.headers.get("content-type", "").startswith(ARROW_HEADERS["Accept"]):
+        return pa.ipc.open_stream(res.content).read_all().to_pandas()
+    return pd.read_csv(io.BytesIO(res.content))
+
+# --- Display-only tables: float32 scores and categorical repeated labels
+# (e.g. Analysis_level) roughly halve what st.dataframe sends the browser ---
+def compact_df(df):
+    dtypes = {c: "float32" for c in df.select_dtypes("float64").columns}
+    for c in df.select_dtypes(["object", "string"]).columns:
+        if df[c].nunique() <= len(df) // 2:
+            dtypes[c] = "category"
+    return df.astype(dtypes)
+
+# --- Cached table fetches for tabs 3-5: going back to cutoffs already
+# fetched in this session is answered without another API round trip ---
+@st.cache_data(ttl=600, max_entries=64)
+def fetch_table(endpoint, params):
+    res = api_get(endpoint, params=params, headers=ARROW_HEADERS, timeout=60)
+    res.raise_for_status()
+    return compact_df(response_to_df(res))
+
+# --- Analysis Level / Analysis Type selectboxes (tabs 3-5) ---
+def render_level_type_selectors(config_data, key, cols):
+    with cols[0]:
+        level = st.selectbox("Analysis Level", list(config_data.keys()), key=f"level_{key}")
+    with cols[1]:
+        types = list(config_data.get(level, {}).keys())
+        a_type = st.selectbox("Analysis Type", types, key=f"type_{key}")
+    return level, a_type
+
 import streamlit as st
 import base64
 import os
@@ -103,6 +168,15 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# ------------------------------------------------------
+# /config is read once per run, before any tab renders, so every tab's
+# selectors share it and a failed fetch is reported (and retried) only once
+try:
+    config_data = fetch_config()
+except Exception as e:
+    config_data = {}
+    st.error(f"Could not fetch /config: {e}")
+
 # ------------------------------------------------------
 # Tabs
 tab1, tab2, tab3, tab4, tab5 = st.tabs([
@@ -120,13 +194,6 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs([
 with tab1:
     st.title("🔬 Gene Viewer")
 
-    try:
-        config_res = requests.get(f"{API_URL}/config")
-        config_data = config_res.json().get("analysis_config", {})
-    except Exception as e:
-        config_data = {}
-        st.error(f"Could not fetch /config: {e}")
-
     col1, col2, col3 = st.columns(3)
     with col1:
         gene_input2 = st.text_input("Gene name or Ensembl ID", "", key="gene_viewer_input")
@@ -159,19 +226,23 @@ with tab1:
             expr_params = psi_params.copy()
 
             try:
-                psi_res = requests.get(f"{API_URL}/psi_block", params=psi_params)
-                psi_df = pd.read_csv(psi_res.url) if psi_res.status_code == 200 else pd.DataFrame()
+                # Both requests go out together; parse the bodies already
+                # downloaded instead of re-fetching them via their URLs
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    psi_future = pool.submit(api_get, "psi_block", params=psi_params, headers=ARROW_HEADERS)
+                    expr_future = pool.submit(api_get, "gene_expression", params=expr_params, headers=ARROW_HEADERS)
+                    psi_res = psi_future.result()
+                    expr_res = expr_future.result()
 
-                expr_res = requests.get(f"{API_URL}/gene_expression", params=expr_params)
-                expr_df = pd.read_csv(expr_res.url) if expr_res.status_code == 200 else pd.DataFrame()
+                psi_df = response_to_df(psi_res) if psi_res.status_code == 200 else pd.DataFrame()
+                expr_df = response_to_df(expr_res) if expr_res.status_code == 200 else pd.DataFrame()
 
                 c1, c2 = st.columns(2, gap="medium")
 
                 if not psi_df.empty:
                     numeric_cols = psi_df.select_dtypes("number").columns
                     if len(numeric_cols) > 0:
-                        row = psi_df.iloc[0]
-                        values = [row[c] for c in numeric_cols]
+                        values = psi_df[numeric_cols].iloc[0].to_numpy()
                         fig_psi = go.Figure()
                         fig_psi.add_trace(go.Bar(x=numeric_cols, y=values, marker_color="gray"))
                         fig_psi.update_layout(
@@ -183,25 +254,20 @@ with tab1:
                 if not expr_df.empty:
                     mean_cols = [c for c in expr_df.columns if c.startswith("mean_")]
                     var_cols = [c for c in expr_df.columns if c.startswith("variance_")]
-                    common_labels = [
-                        c.replace("mean_", "")
-                        for c in mean_cols if "variance_" + c.replace("mean_", "") in var_cols
-                    ]
+                    var_labels = {c[len("variance_"):] for c in var_cols}
+                    common_labels = [c[len("mean_"):] for c in mean_cols if c[len("mean_"):] in var_labels]
                     if common_labels:
-                        mean_vals = [expr_df[f"mean_{c}"].mean() for c in common_labels]
-                        var_vals = [expr_df[f"variance_{c}"].mean() for c in common_labels]
-
-                        mean_df = pd.DataFrame({"Block": common_labels, "Mean": mean_vals})
-                        var_df = pd.DataFrame({"Block": common_labels, "Variance": var_vals})
+                        mean_vals = expr_df[[f"mean_{c}" for c in common_labels]].mean(axis=0).to_numpy()
+                        var_vals = expr_df[[f"variance_{c}" for c in common_labels]].mean(axis=0).to_numpy()
 
                         c2a, c2b = c2.columns(2)
                         fig_mean = go.Figure()
-                        fig_mean.add_trace(go.Bar(x=mean_df["Block"], y=mean_df["Mean"], marker_color="lightgray"))
+                        fig_mean.add_trace(go.Bar(x=common_labels, y=mean_vals, marker_color="lightgray"))
                         fig_mean.update_layout(title="Expression Mean", height=600, xaxis_tickangle=-30)
                         c2a.plotly_chart(fig_mean, use_container_width=True)
 
                         fig_var = go.Figure()
-                        fig_var.add_trace(go.Bar(x=var_df["Block"], y=var_df["Variance"], marker_color="lightgray"))
+                        fig_var.add_trace(go.Bar(x=common_labels, y=var_vals, marker_color="lightgray"))
                         fig_var.update_layout(title="Expression Variance", height=600, xaxis_tickangle=-30)
                         c2b.plotly_chart(fig_var, use_container_width=True)
 
@@ -231,12 +297,12 @@ with tab2:
         else:
             try:
                 params = [("gene_list", g) for g in genes]
-                response = requests.get(f"{API_URL}/specificity", params=params)
+                response = api_get("specificity", params=params, headers=ARROW_HEADERS)
 
                 if response.status_code != 200:
                     st.error(f"API returned {response.status_code}")
                 else:
-                    df = pd.read_csv(response.url)
+                    df = response_to_df(response)
                     if df.empty:
                         st.warning("No results found.")
                     else:
@@ -348,19 +414,7 @@ with tab2:
 with tab3:
     st.title("⭐ Highly Specific Genes")
 
-    try:
-        config_res = requests.get(f"{API_URL}/config")
-        config_data = config_res.json().get("analysis_config", {})
-    except Exception as e:
-        config_data = {}
-        st.error(f"Could not fetch /config: {e}")
-
-    col1, col2 = st.columns(2)
-    with col1:
-        level = st.selectbox("Analysis Level", list(config_data.keys()), key="level_highly_specific")
-    with col2:
-        types = list(config_data.get(level, {}).keys())
-        a_type = st.selectbox("Analysis Type", types, key="type_highly_specific")
+    level, a_type = render_level_type_selectors(config_data, "highly_specific", st.columns(2))
 
     psi_cutoff = st.slider("Ψ cutoff", 0.0, 1.0, 0.5, 0.05, key="psi_cutoff_highly")
     zeta_cutoff = st.slider("ζ cutoff", 0.0, 1.0, 0.5, 0.05, key="zeta_cutoff_highly")
@@ -372,13 +426,12 @@ with tab3:
             "psi_cutoff": psi_cutoff,
             "zeta_cutoff": zeta_cutoff,
         }
-        res = requests.get(f"{API_URL}/highly_specific", params=params)
-        if res.status_code == 200:
-            df = pd.read_csv(res.url)
+        try:
+            df = fetch_table("highly_specific", params)
             st.success(f"Loaded {len(df)} highly specific genes.")
             st.dataframe(df, use_container_width=True, height=400)
-        else:
-            st.error(f"Error {res.status_code} fetching data.")
+        except requests.HTTPError as e:
+            st.error(f"Error {e.response.status_code} fetching data.")
 
 # ======================================================
 # TAB 4 – HOUSEKEEPING GENES
@@ -386,19 +439,7 @@ with tab3:
 with tab4:
     st.title("🏠 Non-specific (Housekeeping) Genes")
 
-    try:
-        config_res = requests.get(f"{API_URL}/config")
-        config_data = config_res.json().get("analysis_config", {})
-    except Exception as e:
-        config_data = {}
-        st.error(f"Could not fetch /config: {e}")
-
-    col1, col2 = st.columns(2)
-    with col1:
-        level = st.selectbox("Analysis Level", list(config_data.keys()), key="level_housekeeping")
-    with col2:
-        types = list(config_data.get(level, {}).keys())
-        a_type = st.selectbox("Analysis Type", types, key="type_housekeeping")
+    level, a_type = render_level_type_selectors(config_data, "housekeeping", st.columns(2))
 
     psi_cutoff = st.slider("Ψ cutoff", 0.0, 1.0, 0.5, 0.05, key="psi_cutoff_house")
     zeta_cutoff = st.slider("ζ cutoff", 0.0, 1.0, 0.5, 0.05, key="zeta_cutoff_house")
@@ -410,13 +451,12 @@ with tab4:
             "psi_cutoff": psi_cutoff,
             "zeta_cutoff": zeta_cutoff,
         }
-        res = requests.get(f"{API_URL}/non_specific", params=params)
-        if res.status_code == 200:
-            df = pd.read_csv(res.url)
+        try:
+            df = fetch_table("non_specific", params)
             st.success(f"Loaded {len(df)} housekeeping genes.")
             st.dataframe(df, use_container_width=True, height=400)
-        else:
-            st.error(f"Error {res.status_code} fetching data.")
+        except requests.HTTPError as e:
+            st.error(f"Error {e.response.status_code} fetching data.")
 
 # ======================================================
 # TAB 5 – MARKER GENES
@@ -424,19 +464,8 @@ with tab4:
 with tab5:
     st.title("🎯 Marker Genes")
 
-    try:
-        config_res = requests.get(f"{API_URL}/config")
-        config_data = config_res.json().get("analysis_config", {})
-    except Exception as e:
-        config_data = {}
-        st.error(f"Could not fetch /config: {e}")
-
     col1, col2, col3 = st.columns(3)
-    with col1:
-        level = st.selectbox("Analysis Level", list(config_data.keys()), key="level_marker")
-    with col2:
-        types = list(config_data.get(level, {}).keys())
-        a_type = st.selectbox("Analysis Type", types, key="type_marker")
+    level, a_type = render_level_type_selectors(config_data, "marker", (col1, col2))
     with col3:
         blocks = config_data.get(level, {}).get(a_type, [])
         block = st.selectbox("Block Label", blocks, key="block_marker")
@@ -452,13 +481,12 @@ with tab5:
             "psi_cutoff": psi_cutoff,
             "psi_block_cutoff": psi_block_cutoff,
         }
-        res = requests.get(f"{API_URL}/marker", params=params)
-        if res.status_code == 200:
-            df = pd.read_csv(res.url)
+        try:
+            df = fetch_table("marker", params)
             st.success(f"Loaded {len(df)} marker genes.")
             st.dataframe(df, use_container_width=True, height=400)
-        else:
-            st.error(f"Error {res.status_code} fetching data.")
+        except requests.HTTPError as e:
+            st.error(f"Error {e.response.status_code} fetching data.")
 
 # --- Spacer ---
 st.markdown("<br><br><br>", unsafe_allow_html=True)
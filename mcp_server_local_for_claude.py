@@ -2,10 +2,15 @@
 """8cubeDB MCP Server - For integration with claude on a local machine"""
 
 import asyncio
+import csv
+import heapq
+import io
 import json
+from operator import itemgetter
 from typing import Any
-from urllib.parse import quote
+from urllib.parse import urlencode
 import httpx
+import time
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 import mcp.server.stdio
@@ -13,6 +18,69 @@ import mcp.server.stdio
 API_URL = "https://eightcubedb.onrender.com"
 server = Server("8cubeDB-Explorer")
 MAX_DISPLAY_ROWS = 50
+# Full-width bar for get_psi_block; sliced to the value instead of rebuilt per row
+PSI_BAR = "█" * 20
+
+# Shared HTTP client: tool calls reuse its keep-alive connections to the API
+# instead of paying a new TCP + TLS handshake each time
+_client: httpx.AsyncClient | None = None
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+# /config changes only when the API's database does; keep it for a few minutes
+CONFIG_TTL = 300  # seconds
+_config_cache: tuple[float, dict] | None = None
+
+async def fetch_config() -> dict:
+    global _config_cache
+    if _config_cache is not None and time.monotonic() - _config_cache[0] < CONFIG_TTL:
+        return _config_cache[1]
+    response = await get_client().get(f"{API_URL}/config", timeout=30.0)
+    response.raise_for_status()
+    config = response.json().get("analysis_config", {})
+    _config_cache = (time.monotonic(), config)
+    return config
+
+def parse_csv(text: str) -> tuple[list[str], list[list[str]]]:
+    """Header and data rows of a CSV response, parsed by the csv module's C reader."""
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, [])
+    return header, list(reader)
+
+async def fetch_gene_names(url: str, params: dict, limit: int = 20) -> tuple[int, list[str]]:
+    """
+    Total row count and first `limit` gene names of a gene-list endpoint.
+    The API trims the rows and counts the matches itself, so only `limit`
+    rows and a single number cross the network. An API without the limit /
+    count_only params returns the full table instead, which is counted here.
+    """
+    client = get_client()
+    rows_response, count_response = await asyncio.gather(
+        client.get(url, params={**params, "limit": limit}),
+        client.get(url, params={**params, "count_only": True})
+    )
+    rows_response.raise_for_status()
+    count_response.raise_for_status()
+    _, rows = parse_csv(rows_response.text)
+    count_header, count_rows = parse_csv(count_response.text)
+    if count_header == ["count"]:
+        count = int(count_rows[0][0])
+    else:
+        count = len(count_rows)
+    return count, [row[0] for row in rows[:limit]]
 
 # Metric explanations
 METRICS_HELP = """
@@ -42,6 +110,16 @@ METRICS_HELP = """
   • HOUSEKEEPING genes (non-specific): LOW ζ + HIGH Ψ
 """
 
+# get_config overview; only the tissue and partition lists vary per call
+OVERVIEW_TEMPLATE = (
+    "8cubeDB Overview\n\n"
+    "Mouse Strains: 129S1_SvImJ, AJ, BALB_cJ, C3H_HeJ, C57BL_6J, CAST_EiJ, NOD_ShiLtJ, PWK_PhJ\n\n"
+    "Tissues: {tissues}\n"
+    "Partitions: {partitions}\n\n"
+    "Call get_config(analysis_level='Liver') for details\n"
+    "Call get_config(show_metrics_help=True) for Ψ, ζ, ψ_block info"
+)
+
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     return [
@@ -179,10 +257,7 @@ async def list_tools() -> list[Tool]:
 async def call_tool(name: str, arguments: Any) -> list[TextContent]:
     
     if name == "get_config":
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{API_URL}/config")
-            response.raise_for_status()
-            config = response.json().get("analysis_config", {})
+        config = await fetch_config()
         
         level = arguments.get("analysis_level")
         atype = arguments.get("analysis_type")
@@ -222,59 +297,56 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
             for tissue_data in config.values():
                 all_types.update(tissue_data.keys())
             
-            summary = "8cubeDB Overview\n\n"
-            summary += "Mouse Strains: 129S1_SvImJ, AJ, BALB_cJ, C3H_HeJ, C57BL_6J, CAST_EiJ, NOD_ShiLtJ, PWK_PhJ\n\n"
-            summary += f"Tissues: {', '.join(tissues)}\n"
-            summary += f"Partitions: {', '.join(sorted(all_types))}\n\n"
-            summary += "Call get_config(analysis_level='Liver') for details\n"
-            summary += "Call get_config(show_metrics_help=True) for Ψ, ζ, ψ_block info"
+            summary = OVERVIEW_TEMPLATE.format(
+                tissues=', '.join(tissues), partitions=', '.join(sorted(all_types))
+            )
             
             return [TextContent(type="text", text=summary)]
     
     elif name == "get_gene_specificity":
         gene = arguments["gene"]
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(f"{API_URL}/specificity", params=[("gene_list", gene)])
-            response.raise_for_status()
-            csv_data = response.text
+        params = {"gene_list": gene}
+        client = get_client()
+        response = await client.get(f"{API_URL}/specificity", params=params)
+        response.raise_for_status()
+        csv_data = response.text
         
-        lines = csv_data.strip().split('\n')
-        if len(lines) <= 1:
+        header, rows = parse_csv(csv_data)
+        if not rows:
             return [TextContent(type="text", text=f"No data for '{gene}'")]
         
-        header = lines[0].split(',')
-        rows = [line.split(',') for line in lines[1:]]
         
         # Find top 3 patterns only
         patterns = []
+        try:
+            i_level = header.index('Analysis_level')
+            i_type = header.index('Analysis_type')
+            i_psi = header.index('Psi_mean')
+            i_zeta = header.index('Zeta_mean')
+        except ValueError:
+            # Columns missing from the response: nothing to rank
+            rows = []
         for row in rows:
-            row_dict = dict(zip(header, row))
             try:
-                psi = float(row_dict.get('Psi_mean', 0))
-                zeta = float(row_dict.get('Zeta_mean', 0))
-                if psi > 0.5 or zeta > 0.5:
-                    patterns.append({
-                        'level': row_dict.get('Analysis_level', ''),
-                        'type': row_dict.get('Analysis_type', ''),
-                        'psi': psi,
-                        'zeta': zeta,
-                        'score': psi + zeta
-                    })
-            except:
+                psi = float(row[i_psi])
+                zeta = float(row[i_zeta])
+                p_level, p_type = row[i_level], row[i_type]
+            except (ValueError, IndexError):
                 continue
-        
-        patterns.sort(key=lambda x: x['score'], reverse=True)
+            if psi > 0.5 or zeta > 0.5:
+                patterns.append((psi + zeta, p_level, p_type, psi, zeta))
         
         analysis = f"{gene} - Top partitions:\n"
-        for i, p in enumerate(patterns[:3], 1):
-            analysis += f"{i}. {p['level']}/{p['type']}: Ψ={p['psi']:.2f}, ζ={p['zeta']:.2f}\n"
-            if p['psi'] >= 0.7 and p['zeta'] >= 0.7:
+        top = heapq.nlargest(3, patterns, key=itemgetter(0))
+        for i, (_, p_level, p_type, psi, zeta) in enumerate(top, 1):
+            analysis += f"{i}. {p_level}/{p_type}: Ψ={psi:.2f}, ζ={zeta:.2f}\n"
+            if psi >= 0.7 and zeta >= 0.7:
                 analysis += "   → Partition-specific\n"
-            elif p['psi'] >= 0.7 and p['zeta'] <= 0.3:
+            elif psi >= 0.7 and zeta <= 0.3:
                 analysis += "   → Housekeeping-like\n"
         
         analysis += f"\nΨ=partition fit, ζ=concentration\n"
-        analysis += f"\n {API_URL}/specificity?gene_list={quote(gene)}\n"
+        analysis += f"\n {API_URL}/specificity?{urlencode(params)}\n"
         return [TextContent(type="text", text=analysis)]
     
     elif name == "get_psi_block":
@@ -282,18 +354,17 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         level = arguments["analysis_level"]
         atype = arguments["analysis_type"]
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(f"{API_URL}/psi_block", 
-                params=[("gene_list", gene), ("analysis_level", level), ("analysis_type", atype)])
-            response.raise_for_status()
-            csv_data = response.text
+        params = {"gene_list": gene, "analysis_level": level, "analysis_type": atype}
+        client = get_client()
+        response = await client.get(f"{API_URL}/psi_block", params=params)
+        response.raise_for_status()
+        csv_data = response.text
         
-        lines = csv_data.strip().split('\n')
-        if len(lines) <= 1:
+        header, rows = parse_csv(csv_data)
+        if not rows:
             return [TextContent(type="text", text=f"No data")]
         
-        header = lines[0].split(',')
-        values = lines[1].split(',')
+        values = rows[0]
         
         block_values = []
         for i, col in enumerate(header):
@@ -303,16 +374,13 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                 except:
                     continue
         
-        block_values.sort(key=lambda x: x[1], reverse=True)
-        
-        analysis = f"{gene} in {level}/{atype}:\n"
-        for block, val in block_values[:10]:
-            bar = "█" * int(val * 20)
-            analysis += f"  {block:20s} {val:.3f} {bar}\n"
+        top = heapq.nlargest(10, block_values, key=itemgetter(1))
+        lines = [f"{gene} in {level}/{atype}:"]
+        lines += [f"  {block:20s} {val:.3f} {PSI_BAR[:int(val * 20)]}" for block, val in top]
         if len(block_values) > 10:
-            analysis += f"  ... {len(block_values)-10} more blocks\n"
-        
-        analysis += f"\n {API_URL}/psi_block?gene_list={quote(gene)}&analysis_level={quote(level)}&analysis_type={quote(atype)}\n"
+            lines.append(f"  ... {len(block_values)-10} more blocks")
+        lines.append(f"\n {API_URL}/psi_block?{urlencode(params)}")
+        analysis = "\n".join(lines) + "\n"
         return [TextContent(type="text", text=analysis)]
     
     elif name == "get_gene_expression":
@@ -320,38 +388,35 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         level = arguments["analysis_level"]
         atype = arguments["analysis_type"]
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(f"{API_URL}/gene_expression",
-                params=[("gene_list", gene), ("analysis_level", level), ("analysis_type", atype)])
-            response.raise_for_status()
-            csv_data = response.text
+        params = {"gene_list": gene, "analysis_level": level, "analysis_type": atype}
+        client = get_client()
+        response = await client.get(f"{API_URL}/gene_expression", params=params)
+        response.raise_for_status()
+        csv_data = response.text
         
-        lines = csv_data.strip().split('\n')
-        if len(lines) <= 1:
+        header, rows = parse_csv(csv_data)
+        if not rows:
             return [TextContent(type="text", text=f"No data")]
         
-        header = lines[0].split(',')
-        values = lines[1].split(',')
+        values = rows[0]
         
         expr_data = []
         mean_cols = [(i, h) for i, h in enumerate(header) if h.startswith('mean_')]
         for idx, col in mean_cols:
             block = col.replace('mean_', '')
             try:
-                expr_data.append({'block': block, 'mean': float(values[idx])})
+                expr_data.append((block, float(values[idx])))
             except:
                 continue
         
-        expr_data.sort(key=lambda x: x['mean'], reverse=True)
-        
         # Top 10 only
-        analysis = f"{gene} in {level}/{atype}:\n"
-        for d in expr_data[:10]:
-            analysis += f"  {d['block']:20s} {d['mean']:>8.1f}\n"
+        top = heapq.nlargest(10, expr_data, key=itemgetter(1))
+        lines = [f"{gene} in {level}/{atype}:"]
+        lines += [f"  {block:20s} {mean:>8.1f}" for block, mean in top]
         if len(expr_data) > 10:
-            analysis += f"  ... {len(expr_data)-10} more\n"
-        
-        analysis += f"\n {API_URL}/gene_expression?gene_list={quote(gene)}&analysis_level={quote(level)}&analysis_type={quote(atype)}\n"
+            lines.append(f"  ... {len(expr_data)-10} more")
+        lines.append(f"\n {API_URL}/gene_expression?{urlencode(params)}")
+        analysis = "\n".join(lines) + "\n"
         return [TextContent(type="text", text=analysis)]
     
     elif name == "get_marker_genes":
@@ -362,28 +427,20 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         psi_block_cut = arguments.get("psi_block_cutoff", 0.7)
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(f"{API_URL}/marker",
-                    params={"analysis_level": level, "analysis_type": atype, 
-                           "block_label": block, "psi_cutoff": psi_cut, "psi_block_cutoff": psi_block_cut})
-                response.raise_for_status()
-                csv_data = response.text
-            
-            lines = csv_data.strip().split('\n')
-            if len(lines) <= 1:
+            params = {"analysis_level": level, "analysis_type": atype, "block_label": block,
+                      "psi_cutoff": psi_cut, "psi_block_cutoff": psi_block_cut}
+            count, genes_list = await fetch_gene_names(f"{API_URL}/marker", params)
+            if count == 0:
                 return [TextContent(type="text", text=f"No markers for {block}. Try lower cutoffs or check block name with get_config.")]
             
-            count = len(lines) - 1
-            
             analysis = f"{block} markers ({count} genes, Ψ≥{psi_cut}, ψ_block≥{psi_block_cut}):\n"
             
             if count > 0:
-                genes_list = [lines[i].split(',')[0] for i in range(1, min(21, len(lines)))]
                 analysis += ', '.join(genes_list)
                 if count > 20:
                     analysis += f" ... +{count-20} more"
             
-            analysis += f"\n\n {API_URL}/marker?analysis_level={quote(level)}&analysis_type={quote(atype)}&block_label={quote(block)}&psi_cutoff={psi_cut}&psi_block_cutoff={psi_block_cut}\n"
+            analysis += f"\n\n {API_URL}/marker?{urlencode(params)}\n"
             
             return [TextContent(type="text", text=analysis)]
         except Exception as e:
@@ -396,39 +453,38 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         zeta_cut = arguments.get("zeta_cutoff", 0.2)
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(f"{API_URL}/non_specific",
-                    params={"analysis_level": level, "analysis_type": atype, 
-                           "psi_cutoff": psi_cut, "zeta_cutoff": zeta_cut})
-                response.raise_for_status()
-                csv_data = response.text
-            
-            lines = csv_data.strip().split('\n')
-            if len(lines) <= 1:
+            # Request the permissive fallback alongside the strict query so an
+            # empty strict result doesn't cost a second round trip
+            params = {"analysis_level": level, "analysis_type": atype,
+                      "psi_cutoff": psi_cut, "zeta_cutoff": zeta_cut}
+            permissive_params = {**params, "psi_cutoff": 0.7, "zeta_cutoff": 0.3}
+            strict, permissive = await asyncio.gather(
+                fetch_gene_names(f"{API_URL}/non_specific", params),
+                fetch_gene_names(f"{API_URL}/non_specific", permissive_params),
+                return_exceptions=True
+            )
+            if isinstance(strict, Exception):
+                raise strict
+            count, genes_list = strict
+            if count == 0:
                 # Try permissive
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    response = await client.get(f"{API_URL}/non_specific",
-                        params={"analysis_level": level, "analysis_type": atype, 
-                               "psi_cutoff": 0.7, "zeta_cutoff": 0.3})
-                    response.raise_for_status()
-                    csv_data = response.text
-                lines = csv_data.strip().split('\n')
+                if isinstance(permissive, Exception):
+                    raise permissive
+                count, genes_list = permissive
+                params = permissive_params
                 psi_cut, zeta_cut = 0.7, 0.3
             
-            if len(lines) <= 1:
+            if count == 0:
                 return [TextContent(type="text", text="No housekeeping genes found even with relaxed cutoffs.")]
             
-            count = len(lines) - 1
-            
             analysis = f"Housekeeping in {level}/{atype} ({count} genes, Ψ≥{psi_cut}, ζ≤{zeta_cut}):\n"
             
             if count > 0:
-                genes_list = [lines[i].split(',')[0] for i in range(1, min(21, len(lines)))]
                 analysis += ', '.join(genes_list)
                 if count > 20:
                     analysis += f" ... +{count-20} more"
             
-            analysis += f"\n\n📥 {API_URL}/non_specific?analysis_level={quote(level)}&analysis_type={quote(atype)}&psi_cutoff={psi_cut}&zeta_cutoff={zeta_cut}\n"
+            analysis += f"\n\n📥 {API_URL}/non_specific?{urlencode(params)}\n"
             
             return [TextContent(type="text", text=analysis)]
         except Exception as e:
@@ -441,29 +497,21 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         zeta_cut = arguments.get("zeta_cutoff", 0.7)
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(f"{API_URL}/highly_specific",
-                    params={"analysis_level": level, "analysis_type": atype,
-                           "psi_cutoff": psi_cut, "zeta_cutoff": zeta_cut})
-                response.raise_for_status()
-                csv_data = response.text
-            
-            lines = csv_data.strip().split('\n')
-            if len(lines) <= 1:
+            params = {"analysis_level": level, "analysis_type": atype,
+                      "psi_cutoff": psi_cut, "zeta_cutoff": zeta_cut}
+            count, genes_list = await fetch_gene_names(f"{API_URL}/highly_specific", params)
+            if count == 0:
                 return [TextContent(type="text", text="No highly specific genes. Try lower cutoffs.")]
             
-            count = len(lines) - 1
-            
             analysis = f"Partition-specific in {level}/{atype} ({count} genes, Ψ≥{psi_cut}, ζ≥{zeta_cut}):\n"
             
             if count > 0:
-                genes_list = [lines[i].split(',')[0] for i in range(1, min(21, len(lines)))]
                 analysis += ', '.join(genes_list)
                 if count > 20:
                     analysis += f" ... +{count-20} more"
             
             analysis += f"\n\nUse get_psi_block to see which blocks.\n"
-            analysis += f"\n {API_URL}/highly_specific?analysis_level={quote(level)}&analysis_type={quote(atype)}&psi_cutoff={psi_cut}&zeta_cutoff={zeta_cut}\n"
+            analysis += f"\n {API_URL}/highly_specific?{urlencode(params)}\n"
             
             return [TextContent(type="text", text=analysis)]
         except Exception as e:
@@ -473,8 +521,11 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         raise ValueError(f"Unknown tool: {name}")
 
 async def main():
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, server.create_initialization_options())
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+    finally:
+        await close_client()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file